@@ -4,57 +4,88 @@ Fix Pino logger call signatures to match proper format:
 log.level(message: string, meta?: Record<string, any>)
 """
 
+import argparse
+import os
 import re
+import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-def fix_logger_call(match):
-    """Fix a single logger call to proper format"""
-    level = match.group(1)  # error, warn, info, debug
-    args = match.group(2)   # everything between parentheses
+# Matches the opening of log.error(...), log.warn(...), log.info(...), log.debug(...)
+LOG_CALL_RE = re.compile(r'log\.(error|warn|info|debug)\(')
+IDENTIFIER_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
 
-    # Split arguments by comma (but not commas inside quotes or objects)
-    arg_parts = []
-    current_arg = ""
+# Build state reused by the optional --verify run so tsc only rechecks what changed
+TSBUILDINFO_PATH = '/tmp/fix-logger.tsbuildinfo'
+TSC_COMMAND = ['npx', 'tsc', '--noEmit', '--incremental', '--tsBuildInfoFile', TSBUILDINFO_PATH]
+REMAINING_ERRORS_LOG = '/tmp/remaining-logger-errors.log'
+
+def scan_args(text, start=0):
+    """Find top-level argument separators in text, starting at start.
+
+    Returns (comma_offsets, end) where end is the index of the first
+    unbalanced ')' or len(text). Works on offsets so arguments can be sliced
+    out afterwards instead of being rebuilt one character at a time.
+    """
+    commas = []
     paren_depth = 0
     brace_depth = 0
-    in_string = False
     string_char = None
-
-    for char in args:
-        if char in ('"', "'", '`') and not in_string:
-            in_string = True
+    i = start
+    n = len(text)
+
+    while i < n:
+        char = text[i]
+        if string_char is not None:
+            if char == '\\':
+                i += 1  # skip escaped character
+            elif char == string_char:
+                string_char = None
+        elif char in ('"', "'", '`'):
             string_char = char
-        elif char == string_char and in_string:
-            in_string = False
-            string_char = None
-        elif char == '(' and not in_string:
+        elif char == '(':
             paren_depth += 1
-        elif char == ')' and not in_string:
+        elif char == ')':
+            if paren_depth == 0:
+                return commas, i
             paren_depth -= 1
-        elif char == '{' and not in_string:
+        elif char == '{':
             brace_depth += 1
-        elif char == '}' and not in_string:
+        elif char == '}':
             brace_depth -= 1
-        elif char == ',' and not in_string and paren_depth == 0 and brace_depth == 0:
-            arg_parts.append(current_arg.strip())
-            current_arg = ""
-            continue
+        elif char == ',' and paren_depth == 0 and brace_depth == 0:
+            commas.append(i)
+        i += 1
+
+    return commas, n
+
+def split_args(text, start=0):
+    """Split the argument list starting at start on top-level commas.
 
-        current_arg += char
+    Returns (arg_parts, end) where end is the index of the closing ')'.
+    """
+    commas, end = scan_args(text, start)
+    bounds = [start - 1] + commas + [end]
+    parts = [text[bounds[j] + 1:bounds[j + 1]].strip() for j in range(len(bounds) - 1)]
+    if parts and not parts[-1]:
+        parts.pop()
+    return parts, end
 
-    if current_arg.strip():
-        arg_parts.append(current_arg.strip())
+def fix_logger_call(level, arg_parts):
+    """Fix a single logger call to proper format.
 
+    Returns the rewritten call, or None if it is already correct.
+    """
     # If already correct format (1 or 2 args, second is object), return as-is
     if len(arg_parts) <= 1:
-        return match.group(0)
+        return None
 
     if len(arg_parts) == 2:
         second_arg = arg_parts[1].strip()
         # Check if second arg is already an object literal
         if second_arg.startswith('{') and second_arg.endswith('}'):
-            return match.group(0)
+            return None
 
     # Fix needed: wrap additional arguments in metadata object
     message = arg_parts[0]
@@ -65,7 +96,7 @@ def fix_logger_call(match):
     for i, arg in enumerate(rest_args):
         arg = arg.strip()
         # If it's a simple variable name, use it as shorthand property
-        if re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', arg):
+        if IDENTIFIER_RE.match(arg):
             metadata_entries.append(arg)
         else:
             # For complex expressions, create numbered keys
@@ -85,12 +116,28 @@ def fix_file(file_path):
 
         original_content = content
 
-        # Pattern to match log.level(...) calls
-        # Matches: log.error(...), log.warn(...), log.info(...), log.debug(...)
-        pattern = r'log\.(error|warn|info|debug)\(([^)]+(?:\([^)]*\))?[^)]*)\)'
+        # Single sweep: locate each log.level( anchor, then scan forward to
+        # its balanced closing paren instead of backtracking with a regex
+        pieces = []
+        pos = 0
+        for match in LOG_CALL_RE.finditer(content):
+            if match.start() < pos:
+                continue  # nested inside a call we already rewrote
 
-        # Replace all matches
-        content = re.sub(pattern, fix_logger_call, content)
+            arg_parts, end = split_args(content, match.end())
+            if end == len(content):
+                continue  # unbalanced call - leave untouched
+
+            fixed_call = fix_logger_call(match.group(1), arg_parts)
+            if fixed_call is None:
+                continue
+
+            pieces.append(content[pos:match.start()])
+            pieces.append(fixed_call)
+            pos = end + 1
+
+        pieces.append(content[pos:])
+        content = ''.join(pieces)
 
         if content != original_content:
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -102,27 +149,41 @@ def fix_file(file_path):
         print(f'  ❌ Error processing {file_path}: {e}')
         return False
 
+def stream_tsc():
+    """Run tsc and yield its diagnostics line by line without buffering them all"""
+    process = subprocess.Popen(
+        TSC_COMMAND,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        env={**os.environ, 'NODE_OPTIONS': '--max-old-space-size=8192'}
+    )
+    try:
+        yield from process.stdout
+    finally:
+        process.stdout.close()
+        process.wait()
+
 def main():
-    # Get list of files with TypeScript errors
-    import subprocess
+    parser = argparse.ArgumentParser(description='Fix Pino logger call signatures')
+    parser.add_argument(
+        '--verify',
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help='re-run tsc incrementally after fixing to count remaining errors'
+    )
+    args = parser.parse_args()
 
+    # Get list of files with TypeScript errors
     print('🔍 Finding files with logger signature errors...')
 
     try:
-        result = subprocess.run(
-            ['npx', 'tsc', '--noEmit'],
-            capture_output=True,
-            text=True,
-            env={'NODE_OPTIONS': '--max-old-space-size=8192'}
-        )
-
-        # Extract unique file paths from errors
-        error_lines = [line for line in result.stderr.split('\n') if line.startswith('src/')]
+        # Extract unique file paths from errors as they are reported
         files = set()
-        for line in error_lines:
-            if '(' in line:
-                file_path = line.split('(')[0]
-                files.add(file_path)
+        for line in stream_tsc():
+            if line.startswith('src/') and '(' in line:
+                files.add(line[:line.index('(')])
 
         files = sorted(files)
 
@@ -133,39 +194,42 @@ def main():
         print(f'📊 Found {len(files)} files with errors')
         print('🔧 Fixing logger signatures...\n')
 
-        fixed_count = 0
-        for i, file_path in enumerate(files, 1):
-            if not Path(file_path).exists():
-                continue
+        existing_files = [file_path for file_path in files if Path(file_path).exists()]
 
-            print(f'[{i}/{len(files)}] Processing: {file_path}')
-            if fix_file(file_path):
-                fixed_count += 1
-                print(f'  ✅ Fixed')
-            else:
-                print(f'  ⏭️  No changes')
+        # Each file is independent and the rewrite is CPU-bound, so fan out
+        # across processes; progress is reported from the main process
+        fixed_count = 0
+        with ProcessPoolExecutor() as executor:
+            futures = {executor.submit(fix_file, file_path): file_path for file_path in existing_files}
+            for i, future in enumerate(as_completed(futures), 1):
+                print(f'[{i}/{len(existing_files)}] Processed: {futures[future]}')
+                if future.result():
+                    fixed_count += 1
+                    print(f'  ✅ Fixed')
+                else:
+                    print(f'  ⏭️  No changes')
 
         print(f'\n✅ Processing complete! Fixed {fixed_count} files')
 
+        if not args.verify:
+            return 0
+
         # Re-run TypeScript check to see remaining errors
         print('\n⚠️  Running TypeScript check to verify fixes...\n')
-        result = subprocess.run(
-            ['npx', 'tsc', '--noEmit'],
-            capture_output=True,
-            text=True,
-            env={'NODE_OPTIONS': '--max-old-space-size=8192'}
-        )
-
-        remaining_errors = len([line for line in result.stderr.split('\n') if line.startswith('src/')])
+        remaining_errors = 0
+        with open(REMAINING_ERRORS_LOG, 'w') as log_file:
+            for line in stream_tsc():
+                log_file.write(line)
+                if line.startswith('src/'):
+                    remaining_errors += 1
+
         print(f'\n📊 Remaining TypeScript errors: {remaining_errors}')
 
         if remaining_errors == 0:
             print('✅ All logger signature errors fixed!')
             return 0
         else:
-            print('⚠️  Some errors remain - saving to /tmp/remaining-logger-errors.log')
-            with open('/tmp/remaining-logger-errors.log', 'w') as f:
-                f.write(result.stderr)
+            print(f'⚠️  Some errors remain - saved to {REMAINING_ERRORS_LOG}')
             return 1
 
     except Exception as e:
@@ -4,32 +4,100 @@ Next.js 15 Params Migration Script
 Converts all dynamic route pages to use Promise<params> pattern
 """
 
+import io
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
 
+# Old per-resource ID variables that get renamed to plain 'id'
+OLD_ID_VARS = (
+    'taskId',
+    'orderId',
+    'paymentId',
+    'invoiceId',
+    'shipmentId',
+    'inspectionId',
+    'jobId',
+    'documentId',
+)
+
+# Patterns compiled once at import rather than on every file
+USE_PARAMS_PROP_RE = re.compile(rb'params:\s*\{|}\s*{\s*params\s*}:|function.*\{\s*params\s*}:')
+REACT_IMPORT_RE = re.compile(rb'(import\s*\{)([^}]*)(}\s*from\s*["\']react["\'])')
+USE_WORD_RE = re.compile(rb'\buse\b')
+PARAMS_FUNC_RE = re.compile(rb'export\s+default\s+function\s+\w+\s*\([^)]*params[^)]*\)\s*\{')
+OLD_ID_ALTERNATION = b'|'.join(var.encode() for var in OLD_ID_VARS)
+# First default export, with its signature and the rest of the line that
+# opens the body, so the interface, signature and unwrap can be spliced in
+# from a single match
+DEFAULT_EXPORT_RE = re.compile(
+    rb'(?P<head>export\s+default\s+function\s+\w+)(?:(?P<sig>\([^)]*\))(?P<body>\s*\{[^\n]*\n)?)?'
+)
+
+def _param_patterns(name):
+    """Compile the patterns that depend on the route param name"""
+    name = name.encode()
+    iface = rb'params:\s*\{\s*%s:\s*string\s*\}' % name
+    return {
+        'iface': re.compile(iface),
+        # Params prop pattern: the component signature (through the end of
+        # the line opening its body), the params type and params.<name>
+        # accesses, rewritten in one scan
+        'prop_rewrite': re.compile(
+            rb'(?P<func>export\s+default\s+function\s+\w+\s*\([^)]*params[^)]*\)\s*\{[^\n]*\n)'
+            rb'|(?P<iface>%s)'
+            rb'|(?P<access>\bparams\.%s\b)' % (iface, name)
+        ),
+        # useParams() pattern: the hook call, old const <id> = params(?).<id>
+        # as string; extractions, useParams imports and old ID variable
+        # references, rewritten in one scan
+        'hook_rewrite': re.compile(
+            rb'(?P<remove>[ \t]*const\s+params\s*=\s*useParams\(\);\s*\n'
+            rb'|[ \t]*const\s+(?:(?:%s)\s*=\s*params\??\.id|%s\s*=\s*params\??\.%s)\s+as\s+string;\s*\n'
+            rb'|\s*useParams\s*,|,?\s*useParams\b\s*)'
+            rb'|(?P<id_var>\b(?:%s)\b)' % (OLD_ID_ALTERNATION, name, name, OLD_ID_ALTERNATION)
+        ),
+    }
+
+PATTERNS = {name: _param_patterns(name) for name in ('id', 'trackingNumber')}
+
 def detect_param_name(content):
     """Detect if param is 'id' or 'trackingNumber'"""
-    if '[trackingNumber]' in content or 'trackingNumber' in content:
+    if b'[trackingNumber]' in content or b'trackingNumber' in content:
         return 'trackingNumber'
     return 'id'
 
 def already_migrated(content):
     """Check if file already uses use(params) pattern"""
-    return 'use(params)' in content or 'const resolvedParams = use(params)' in content
+    return b'use(params)' in content or b'const resolvedParams = use(params)' in content
 
 def uses_params_prop(content):
     """Check if file uses params prop pattern"""
     # Look for interface with params or direct params in function signature
-    return bool(re.search(r'params:\s*\{', content) or
-                re.search(r'}\s*{\s*params\s*}:', content) or
-                re.search(r'function.*\{\s*params\s*}:', content))
+    return bool(USE_PARAMS_PROP_RE.search(content))
+
+def add_react_use_import(content):
+    """Add 'use' to the first React named import unless one already has it"""
+    first_import = None
+    for match in REACT_IMPORT_RE.finditer(content):
+        if USE_WORD_RE.search(match.group(2)):
+            return content
+        if first_import is None:
+            first_import = match
+
+    if first_import is None:
+        return content
+    return content[:first_import.end(1)] + b' use, ' + content[first_import.start(2):]
 
 def migrate_file(file_path):
     """Migrate a single file to Next.js 15 params pattern"""
     print(f"\nProcessing: {file_path}")
 
-    with open(file_path, 'r', encoding='utf-8') as f:
+    # Work on raw bytes: every pattern below only looks at ASCII syntax, so
+    # there is no need to decode and re-encode the file
+    with open(file_path, 'rb') as f:
         original_content = f.read()
 
     # Check if already migrated
@@ -37,149 +105,95 @@ def migrate_file(file_path):
         print("  ✓ Already migrated - skipping")
         return False
 
+    # Cheap substring prefilter: neither pattern applies without one of these
+    if b'params' not in original_content and b'useParams(' not in original_content:
+        print("  - No params usage - skipping")
+        return False
+
     content = original_content
     param_name = detect_param_name(content)
+    name = param_name.encode()
+    patterns = PATTERNS[param_name]
+    unwrap_statement = b'  const { %s } = use(params);\n' % name  # Standard 2-space indent
     print(f"  → Detected param name: {param_name}")
 
     # Step 1: Add 'use' to React imports if not present
-    if 'from "react"' in content or "from 'react'" in content:
-        # Check if 'use' is already imported
-        if not re.search(r'import\s*\{[^}]*\buse\b[^}]*\}\s*from\s*["\']react["\']', content):
-            # Find React import and add 'use'
-            content = re.sub(
-                r'(import\s*\{)([^}]*)(}\s*from\s*["\']react["\'])',
-                r'\1 use, \2\3',
-                content,
-                count=1
-            )
+    if b'from "react"' in content or b"from 'react'" in content:
+        with_use = add_react_use_import(content)
+        if with_use != content:
+            content = with_use
             print("  → Added 'use' to React imports")
 
     # Step 2: Handle params prop pattern
     if uses_params_prop(content):
         print("  → Using params prop pattern")
 
-        # Update interface definition
-        # Pattern: params: { id: string }
-        # Replace with: params: Promise<{ id: string }>
-        content = re.sub(
-            rf'params:\s*\{{\s*{param_name}:\s*string\s*\}}',
-            rf'params: Promise<{{ {param_name}: string }}>',
-            content
-        )
-        print(f"  → Updated interface to use Promise<{{ {param_name}: string }}>")
+        promise_type = b'params: Promise<{ %s: string }>' % name
 
-        # Find the component function and add unwrapping
-        # Look for function signature
-        func_match = re.search(
-            r'(export\s+default\s+function\s+\w+\s*\([^)]*params[^)]*\)\s*\{)',
-            content
-        )
-
-        if func_match:
-            func_end = func_match.end()
-            # Insert unwrapping statement after opening brace
-            # Find the next newline and insert there
-            next_newline = content.find('\n', func_end)
-            if next_newline != -1:
-                indent = '  '  # Standard 2-space indent
-                unwrap_statement = f'{indent}const {{ {param_name} }} = use(params);\n'
-                content = content[:next_newline+1] + unwrap_statement + content[next_newline+1:]
+        # Without a matching component signature there is nowhere to unwrap
+        # params, so only the type is updated
+        if not PARAMS_FUNC_RE.search(content):
+            content = patterns['iface'].sub(promise_type, content)
+            print(f"  → Updated interface to use Promise<{{ {param_name}: string }}>")
+        else:
+            unwrapped = False
+
+            def rewrite(match):
+                nonlocal unwrapped
+                kind = match.lastgroup
+                if kind == 'iface':
+                    return promise_type
+                if kind == 'access':
+                    return name
+                # Insert unwrapping statement after the line opening the body
+                signature = patterns['iface'].sub(promise_type, match.group(0))
+                if unwrapped:
+                    return signature
+                unwrapped = True
+                return signature + unwrap_statement
+
+            content = patterns['prop_rewrite'].sub(rewrite, content)
+            print(f"  → Updated interface to use Promise<{{ {param_name}: string }}>")
+            if unwrapped:
                 print(f"  → Added const {{ {param_name} }} = use(params);")
-
-            # Replace all params.id with just id
-            content = re.sub(rf'\bparams\.{param_name}\b', param_name, content)
             print(f"  → Replaced all params.{param_name} with {param_name}")
 
     # Step 3: Handle useParams() hook pattern
-    elif 'useParams()' in content:
+    elif b'useParams()' in content:
         print("  → Using useParams() hook pattern - converting to params prop")
 
-        # Remove useParams import
-        content = re.sub(r',?\s*useParams\s*', '', content)
-        content = re.sub(r'useParams\s*,?\s*', '', content)
-        print("  → Removed useParams from imports")
-
-        # Remove useParams() call
-        content = re.sub(
-            rf'const\s+params\s*=\s*useParams\(\);\s*\n',
-            '',
+        # Remove the useParams() call, old taskId/orderId/etc extractions and
+        # useParams imports, and rename old ID variables to 'id', in one pass
+        content = patterns['hook_rewrite'].sub(
+            lambda match: b'id' if match.lastgroup == 'id_var' else b'',
             content
         )
-
-        # Remove taskId/orderId/etc variable extraction if exists
-        old_id_patterns = [
-            rf'const\s+{param_name}\s*=\s*params\.{param_name}\s+as\s+string;\s*\n',
-            rf'const\s+{param_name}\s*=\s*params\?\.{param_name}\s+as\s+string;\s*\n',
-            rf'const\s+taskId\s*=\s*params\.id\s+as\s+string;\s*\n',
-            rf'const\s+orderId\s*=\s*params\.id\s+as\s+string;\s*\n',
-            rf'const\s+paymentId\s*=\s*params\.id\s+as\s+string;\s*\n',
-            rf'const\s+invoiceId\s*=\s*params\.id\s+as\s+string;\s*\n',
-            rf'const\s+shipmentId\s*=\s*params\.id\s+as\s+string;\s*\n',
-            rf'const\s+inspectionId\s*=\s*params\.id\s+as\s+string;\s*\n',
-            rf'const\s+jobId\s*=\s*params\.id\s+as\s+string;\s*\n',
-            rf'const\s+documentId\s*=\s*params\.id\s+as\s+string;\s*\n',
-        ]
-        for pattern in old_id_patterns:
-            content = re.sub(pattern, '', content)
-
+        print("  → Removed useParams from imports")
         print("  → Removed useParams() call and old variable extractions")
 
-        # Add interface for params
-        # Find export default function and add interface before it
-        func_match = re.search(
-            r'(export\s+const\s+dynamic\s*=.*?;\s*\n+)?(export\s+default\s+function\s+\w+)',
-            content,
-            re.DOTALL
-        )
+        # Add interface for params before the default export, accept params
+        # in its signature and unwrap them at the top of the body
+        func_match = DEFAULT_EXPORT_RE.search(content)
 
         if func_match:
-            insert_pos = func_match.start(2)
-            interface_code = f'''interface PageProps {{
-  params: Promise<{{ {param_name}: string }}>;
-}}
+            interface_code = b'''interface PageProps {
+  params: Promise<{ %s: string }>;
+}
+
+''' % name
+            signature = func_match.group('sig')
+            if signature == b'()':
+                signature = b'({ params }: PageProps)'
+            pieces = [content[:func_match.start()], interface_code, func_match.group('head'), signature or b'']
+            if func_match.group('body'):
+                pieces += [func_match.group('body'), unwrap_statement]
+            pieces.append(content[func_match.end():])
+            content = b''.join(pieces)
 
-'''
-            content = content[:insert_pos] + interface_code + content[insert_pos:]
             print(f"  → Added PageProps interface")
-
-            # Update function signature to accept params
-            content = re.sub(
-                r'(export\s+default\s+function\s+\w+)\(\)',
-                r'\1({ params }: PageProps)',
-                content,
-                count=1
-            )
             print("  → Updated function signature to accept params")
-
-            # Add unwrapping statement at beginning of function
-            func_match = re.search(
-                r'(export\s+default\s+function\s+\w+\([^)]*\)\s*\{)',
-                content
-            )
-            if func_match:
-                func_end = func_match.end()
-                next_newline = content.find('\n', func_end)
-                if next_newline != -1:
-                    indent = '  '
-                    unwrap_statement = f'{indent}const {{ {param_name} }} = use(params);\n'
-                    content = content[:next_newline+1] + unwrap_statement + content[next_newline+1:]
-                    print(f"  → Added const {{ {param_name} }} = use(params);")
-
-        # Replace specific ID variable names with just 'id'
-        id_replacements = {
-            'taskId': 'id',
-            'orderId': 'id',
-            'paymentId': 'id',
-            'invoiceId': 'id',
-            'shipmentId': 'id',
-            'inspectionId': 'id',
-            'jobId': 'id',
-            'documentId': 'id',
-        }
-
-        for old_var, new_var in id_replacements.items():
-            # Only replace as complete word boundaries
-            content = re.sub(rf'\b{old_var}\b', new_var, content)
+            if func_match.group('body'):
+                print(f"  → Added const {{ {param_name} }} = use(params);")
 
         print("  → Replaced ID variable references")
 
@@ -189,7 +203,7 @@ def migrate_file(file_path):
 
     # Write the modified content
     if content != original_content:
-        with open(file_path, 'w', encoding='utf-8') as f:
+        with open(file_path, 'wb') as f:
             f.write(content)
         print("  ✓ Migration complete")
         return True
@@ -197,6 +211,13 @@ def migrate_file(file_path):
         print("  - No changes made")
         return False
 
+def migrate_file_captured(file_path):
+    """Run migrate_file, returning (migrated, output) so parallel logs don't interleave"""
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        migrated = migrate_file(file_path)
+    return migrated, buffer.getvalue()
+
 def main():
     """Main migration function"""
     # List of all dynamic route files
@@ -239,16 +260,25 @@ def main():
     modified_files = []
     skipped_files = []
 
+    existing_files = []
     for file_path in files:
         if Path(file_path).exists():
-            if migrate_file(file_path):
-                modified_files.append(file_path)
-            else:
-                skipped_files.append(file_path)
+            existing_files.append(file_path)
         else:
             print(f"\n⚠ File not found: {file_path}")
             skipped_files.append(file_path)
 
+    # Files are independent, so migrate them in parallel and replay each
+    # file's log in order once it is done
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(migrate_file_captured, existing_files)
+        for file_path, (migrated, output) in zip(existing_files, results):
+            print(output, end="")
+            if migrated:
+                modified_files.append(file_path)
+            else:
+                skipped_files.append(file_path)
+
     print("\n" + "=" * 80)
     print("Migration Summary")
     print("=" * 80)